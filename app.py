@@ -1,10 +1,17 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_from_directory, g
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import datetime, timedelta
 import sqlite3
 import os
+import re
 import secrets
+import heapq
+import math
+import tempfile
+import threading
+import time
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -12,6 +19,13 @@ from email.mime.multipart import MIMEMultipart
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
 
+# Number of proxies in front of the app whose X-Forwarded-For entry is trusted
+# for request.remote_addr. Off by default so clients of a directly exposed app
+# cannot spoof their address; the Procfile sets 1 for Heroku's router.
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+if TRUSTED_PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
 # Configuration
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
@@ -43,7 +57,8 @@ def init_db():
             name TEXT NOT NULL,
             email TEXT UNIQUE NOT NULL,
             password TEXT NOT NULL,
-            college_code TEXT UNIQUE
+            college_code TEXT UNIQUE,
+            auto_assign BOOLEAN DEFAULT 0
         )
     ''')
     
@@ -54,6 +69,8 @@ def init_db():
             email TEXT UNIQUE NOT NULL,
             password TEXT NOT NULL,
             college_id INTEGER,
+            keywords TEXT,
+            open_complaints INTEGER DEFAULT 0,
             FOREIGN KEY (college_id) REFERENCES colleges(id)
         )
     ''')
@@ -68,6 +85,7 @@ def init_db():
             student_id INTEGER,
             staff_id INTEGER,
             college_id INTEGER,
+            assigned_by TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (student_id) REFERENCES students(id),
             FOREIGN KEY (staff_id) REFERENCES staff(id),
@@ -122,6 +140,34 @@ def check_and_migrate_db():
         if 'college_code' not in student_cols:
             cursor.execute('ALTER TABLE students ADD COLUMN college_code TEXT')
             conn.commit()
+        
+        if 'auto_assign' not in college_cols:
+            cursor.execute('ALTER TABLE colleges ADD COLUMN auto_assign BOOLEAN DEFAULT 0')
+            conn.commit()
+        
+        # Check if staff table has routing columns
+        cursor.execute('PRAGMA table_info(staff)')
+        staff_cols = [row[1] for row in cursor.fetchall()]
+        if 'keywords' not in staff_cols:
+            cursor.execute('ALTER TABLE staff ADD COLUMN keywords TEXT')
+            conn.commit()
+        if 'open_complaints' not in staff_cols:
+            cursor.execute('ALTER TABLE staff ADD COLUMN open_complaints INTEGER DEFAULT 0')
+            # Backfill the counter from existing assignments
+            cursor.execute('''
+                UPDATE staff SET open_complaints = (
+                    SELECT COUNT(*) FROM complaints
+                    WHERE complaints.staff_id = staff.id AND complaints.status != 'Resolved'
+                )
+            ''')
+            conn.commit()
+        
+        # Check if complaints table records how they were assigned
+        cursor.execute('PRAGMA table_info(complaints)')
+        complaint_cols = [row[1] for row in cursor.fetchall()]
+        if 'assigned_by' not in complaint_cols:
+            cursor.execute('ALTER TABLE complaints ADD COLUMN assigned_by TEXT')
+            conn.commit()
             
     except sqlite3.OperationalError as e:
         # Column might already exist, ignore
@@ -147,6 +193,401 @@ def create_notification(user_type, user_id, message):
     db.commit()
     db.close()
 
+# Load shedding
+# Every endpoint class gets a cap on concurrent requests and a token bucket per
+# user (or per IP when logged out). When a class is saturated the request is
+# rejected straight away with 503/429 and Retry-After instead of queueing behind
+# the busy workers, so cheap requests like notification polls keep flowing.
+#
+# The concurrency caps only matter when a worker serves several requests at
+# once and the workers share their limits, i.e. gunicorn with --threads > 1
+# and RATE_LIMIT_BACKEND=local as in the Procfile. With the default single
+# sync worker only the rate limits have any effect.
+LIMIT_CLASSES = {
+    'auth': {
+        'endpoints': {'student_login', 'college_login', 'staff_login',
+                      'student_signup', 'college_signup', 'staff_signup',
+                      'forgot_password', 'reset_password'},
+        'methods': {'POST'},
+        'concurrency': 4,
+        'rate': 0.2,  # tokens per second
+        'burst': 10,
+        'json_endpoints': set(),
+        # Many students share one campus NAT address, so logged out buckets
+        # are per address and submitted email rather than per address alone
+        'key_field': 'email'
+    },
+    'dashboard': {
+        'endpoints': {'student_dashboard', 'college_dashboard', 'staff_dashboard',
+                      'simulate_routing_policies'},
+        'methods': {'GET'},
+        'concurrency': 8,
+        'rate': 1.0,
+        'burst': 10,
+        'json_endpoints': {'simulate_routing_policies'},
+        'key_field': None
+    },
+    'poll': {
+        'endpoints': {'get_notifications'},
+        'methods': {'GET'},
+        'concurrency': 16,
+        'rate': 0.5,
+        'burst': 5,
+        'json_endpoints': {'get_notifications'},
+        'key_field': None
+    }
+}
+
+# 'memory' keeps limits inside each worker process, 'local' shares them between
+# all workers on this machine through files in RATE_LIMIT_DIR
+app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', '1') != '0'
+app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+app.config['RATE_LIMIT_DIR'] = os.environ.get('RATE_LIMIT_DIR',
+                                              os.path.join(tempfile.gettempdir(), 'complaintbox-limits'))
+
+class MemoryLimiter:
+    """Concurrency slots and token buckets shared by the threads of one process"""
+    
+    PRUNE_INTERVAL = 60  # seconds between sweeps for full buckets
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots = {}
+        self.buckets = {}
+        self.next_prune = time.monotonic() + self.PRUNE_INTERVAL
+    
+    def acquire_slot(self, name, limit):
+        with self.lock:
+            if self.slots.get(name, 0) >= limit:
+                return None
+            self.slots[name] = self.slots.get(name, 0) + 1
+            return name
+    
+    def release_slot(self, slot):
+        with self.lock:
+            self.slots[slot] -= 1
+    
+    def take_token(self, key, rate, burst):
+        """Take a token, returning 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        with self.lock:
+            if now >= self.next_prune:
+                # Drop buckets that have refilled, a missing bucket starts full
+                self.buckets = {k: v for k, v in self.buckets.items() if v[2] > now}
+                self.next_prune = now + self.PRUNE_INTERVAL
+            tokens, updated, _ = self.buckets.get(key, (burst, now, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            # Each bucket remembers when it will be full again for pruning
+            self.buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return wait
+
+class LocalLimiter:
+    """Concurrency slots and token buckets shared by every worker on this machine.
+    
+    A slot is one of `limit` lock files held with flock, so the slot of a
+    crashed worker is released by the kernel. Token buckets live in a small
+    SQLite database in the same directory.
+    """
+    
+    PRUNE_INTERVAL = 60  # seconds between sweeps for full buckets
+    
+    def __init__(self, directory):
+        import fcntl
+        self.fcntl = fcntl
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.db_path = os.path.join(directory, 'buckets.db')
+        self.next_prune = 0
+        conn = sqlite3.connect(self.db_path)
+        # Buckets are only a cache, recreate the table if it predates full_at
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(buckets)')]
+        if columns and 'full_at' not in columns:
+            conn.execute('DROP TABLE buckets')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                full_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS buckets_full_at ON buckets (full_at)')
+        conn.commit()
+        conn.close()
+    
+    def acquire_slot(self, name, limit):
+        for i in range(limit):
+            fd = os.open(os.path.join(self.directory, f'{name}.{i}.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                self.fcntl.flock(fd, self.fcntl.LOCK_EX | self.fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+    
+    def release_slot(self, slot):
+        self.fcntl.flock(slot, self.fcntl.LOCK_UN)
+        os.close(slot)
+    
+    def take_token(self, key, rate, burst):
+        """Take a token, returning 0 on success or the seconds until one is available"""
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, timeout=1.0, isolation_level=None)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(now - updated, 0) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            conn.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                         (key, tokens, now, now + (burst - tokens) / rate))
+            if now >= self.next_prune:
+                # Drop buckets that have refilled, a missing bucket starts full
+                conn.execute('DELETE FROM buckets WHERE full_at <= ?', (now,))
+                self.next_prune = now + self.PRUNE_INTERVAL
+            conn.execute('COMMIT')
+            return wait
+        except sqlite3.OperationalError:
+            # Never let the limiter itself become the bottleneck
+            return 0
+        finally:
+            conn.close()
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_limiter():
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            if app.config['RATE_LIMIT_BACKEND'] == 'local':
+                _limiter = LocalLimiter(app.config['RATE_LIMIT_DIR'])
+            else:
+                _limiter = MemoryLimiter()
+        return _limiter
+
+def get_limit_class(endpoint, method):
+    for name, limits in LIMIT_CLASSES.items():
+        if endpoint in limits['endpoints'] and method in limits['methods']:
+            return name, limits
+    return None, None
+
+def limit_response(limits, status, message, retry_after):
+    # JSON routes get the same {'success': False, ...} shape as their other errors
+    if request.endpoint in limits['json_endpoints']:
+        response = jsonify({'success': False, 'message': message})
+    elif request.method == 'POST':
+        # Show the form again with the error, like any other failed submit
+        flash(message, 'error')
+        response = app.make_response(render_template(f'{request.endpoint}.html', **request.view_args))
+    else:
+        flash(message, 'error')
+        response = app.make_response(render_template('index.html'))
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+@app.before_request
+def shed_load():
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return None
+    
+    name, limits = get_limit_class(request.endpoint, request.method)
+    if not name:
+        return None
+    
+    limiter = get_limiter()
+    if 'user_id' in session and 'user_type' in session:
+        key = f"{name}:{session['user_type']}:{session['user_id']}"
+    else:
+        key = f'{name}:ip:{request.remote_addr}'
+        if limits['key_field'] and request.form.get(limits['key_field']):
+            key += f":{request.endpoint}:{request.form[limits['key_field']].strip().lower()}"
+    
+    # Take the slot first so a request shed with 503 does not spend a token
+    slot = limiter.acquire_slot(name, limits['concurrency'])
+    if slot is None:
+        return limit_response(limits, 503, 'Server is busy, please try again shortly.', 1)
+    
+    wait = limiter.take_token(key, limits['rate'], limits['burst'])
+    if wait:
+        limiter.release_slot(slot)
+        return limit_response(limits, 429, 'Too many requests, please slow down.', wait)
+    
+    g.limit_slot = slot
+    return None
+
+@app.teardown_request
+def release_limit_slot(exc):
+    slot = g.pop('limit_slot', None)
+    if slot is not None:
+        get_limiter().release_slot(slot)
+
+# Complaint routing
+ROUTING_POLICIES = ('keyword_least_loaded', 'least_loaded', 'keyword', 'manual')
+MAX_HOLD_HOURS = 24 * 365
+
+def parse_keywords(keywords):
+    """Split a comma separated keyword string into lowercase keywords"""
+    if not keywords:
+        return []
+    return [k.strip().lower() for k in keywords.split(',') if k.strip()]
+
+def matches_keywords(text, keywords):
+    """Check whether any keyword appears in text as a whole word or phrase"""
+    # Pad with spaces so a phrase only matches on word boundaries
+    words = ' ' + ' '.join(re.findall(r'\w+', text.lower())) + ' '
+    for keyword in parse_keywords(keywords):
+        phrase = ' '.join(re.findall(r'\w+', keyword))
+        if phrase and f' {phrase} ' in words:
+            return True
+    return False
+
+def pick_staff(text, staff_members, loads, policy='keyword_least_loaded', assigned=None):
+    """Pick a staff id for a complaint, or None if nobody can take it.
+
+    staff_members is a list of (staff_id, keywords) and loads maps
+    staff_id to the number of open complaints it currently holds. The
+    optional assigned map of complaints handed out so far breaks ties
+    between equally loaded staff.
+    """
+    if not staff_members:
+        return None
+
+    candidates = [staff_id for staff_id, _ in staff_members]
+    if policy in ('keyword', 'keyword_least_loaded'):
+        matched = [staff_id for staff_id, keywords in staff_members
+                   if matches_keywords(text, keywords)]
+        if matched:
+            candidates = matched
+        elif policy == 'keyword':
+            return None
+        if policy == 'keyword':
+            return candidates[0]
+
+    # Least loaded first, then fewest assigned, then lowest id so routing is deterministic
+    assigned = assigned or {}
+    return min(candidates, key=lambda staff_id: (loads.get(staff_id, 0), assigned.get(staff_id, 0), staff_id))
+
+def adjust_open_count(cursor, staff_id, delta):
+    if staff_id:
+        cursor.execute('UPDATE staff SET open_complaints = MAX(open_complaints + ?, 0) WHERE id = ?',
+                       (delta, staff_id))
+
+def auto_assign_complaint(cursor, complaint_id, college_id, text):
+    """Route a new complaint to staff of the same college if auto assign is on"""
+    cursor.execute('SELECT auto_assign FROM colleges WHERE id = ?', (college_id,))
+    college = cursor.fetchone()
+    if not college or not college['auto_assign']:
+        return None
+
+    cursor.execute('SELECT id, keywords, open_complaints FROM staff WHERE college_id = ?', (college_id,))
+    staff_rows = cursor.fetchall()
+    staff_members = [(row['id'], row['keywords']) for row in staff_rows]
+    loads = {row['id']: row['open_complaints'] or 0 for row in staff_rows}
+
+    staff_id = pick_staff(text, staff_members, loads)
+    if staff_id:
+        cursor.execute('UPDATE complaints SET staff_id = ?, status = ?, assigned_by = ? WHERE id = ?',
+                       (staff_id, 'In Progress', 'auto', complaint_id))
+        adjust_open_count(cursor, staff_id, 1)
+    return staff_id
+
+def parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+def simulate_routing(cursor, college_id, policy, hold_hours=72):
+    """Replay historical complaints of a college through a routing policy.
+
+    Nothing is written to the database. Resolution times are not recorded,
+    so load is modelled over time from created_at: a complaint that is
+    resolved today is open for hold_hours after it was filed, one that is
+    still open stays open for the rest of the replay.
+
+    The manual policy replays the stored assignments made by the college and
+    leaves out complaints that were auto assigned. Assignments from before
+    assigned_by was recorded were all made by hand.
+    """
+    cursor.execute('SELECT id, keywords FROM staff WHERE college_id = ? ORDER BY id', (college_id,))
+    staff_members = [(row['id'], row['keywords']) for row in cursor.fetchall()]
+    staff_ids = {staff_id for staff_id, _ in staff_members}
+
+    # Older complaints were stamped with the first college's id, so find the
+    # history through the students' college code like college_dashboard does
+    cursor.execute('SELECT college_code FROM colleges WHERE id = ?', (college_id,))
+    college = cursor.fetchone()
+    college_code = college['college_code'] if college else None
+    cursor.execute('''
+        SELECT c.title, c.description, c.status, c.staff_id, c.assigned_by, c.created_at FROM complaints c
+        JOIN students s ON c.student_id = s.id
+        WHERE s.college_code = ?
+        ORDER BY c.created_at, c.id
+    ''', (college_code,))
+    complaints = cursor.fetchall()
+
+    totals = {staff_id: 0 for staff_id in staff_ids}
+    loads = {staff_id: 0 for staff_id in staff_ids}
+    closing = []  # heap of (closed_at, staff_id) for complaints still open
+    hold = timedelta(hours=hold_hours)
+    now = None
+    peak_load = 0
+    unassigned = 0
+    outside_college = 0
+    auto_assigned = 0
+    keyword_hits = 0
+
+    for complaint in complaints:
+        now = parse_timestamp(complaint['created_at']) or now
+        while closing and now and closing[0][0] <= now:
+            loads[heapq.heappop(closing)[1]] -= 1
+
+        text = f"{complaint['title']} {complaint['description']}"
+        if policy == 'manual':
+            if complaint['assigned_by'] == 'auto':
+                auto_assigned += 1
+                continue
+            staff_id = complaint['staff_id']
+            if staff_id and staff_id not in staff_ids:
+                # Assigned to someone who is not staff of this college
+                outside_college += 1
+                continue
+        else:
+            staff_id = pick_staff(text, staff_members, loads, policy, totals)
+
+        if not staff_id:
+            unassigned += 1
+            continue
+
+        if matches_keywords(text, dict(staff_members)[staff_id]):
+            keyword_hits += 1
+        totals[staff_id] += 1
+        loads[staff_id] += 1
+        peak_load = max(peak_load, loads[staff_id])
+        if complaint['status'] == 'Resolved' and now:
+            heapq.heappush(closing, (now + hold, staff_id))
+
+    return {
+        'policy': policy,
+        'complaints': len(complaints),
+        'unassigned': unassigned,
+        'assigned_outside_college': outside_college,
+        'auto_assigned_excluded': auto_assigned,
+        'keyword_matches': keyword_hits,
+        'assigned_per_staff': {str(k): v for k, v in totals.items()},
+        'open_per_staff': {str(k): v for k, v in loads.items()},
+        'hold_hours': hold_hours,
+        'peak_open_load': peak_load,
+        'imbalance': (max(totals.values()) - min(totals.values())) if totals else 0
+    }
+
 # Routes
 @app.route('/')
 def index():
@@ -303,9 +744,10 @@ def college_dashboard():
     cursor = db.cursor()
     
     # Get college code
-    cursor.execute('SELECT college_code FROM colleges WHERE id = ?', (session['user_id'],))
+    cursor.execute('SELECT college_code, auto_assign FROM colleges WHERE id = ?', (session['user_id'],))
     college_data = cursor.fetchone()
     college_code = college_data['college_code'] if college_data else None
+    auto_assign = bool(college_data['auto_assign']) if college_data else False
     
     # Get staff members for this college
     cursor.execute('SELECT * FROM staff WHERE college_id = ?', (session['user_id'],))
@@ -338,7 +780,8 @@ def college_dashboard():
     
     db.close()
     
-    return render_template('college_dashboard.html', complaints=complaints_list, staff_members=staff_members, college_code=college_code)
+    return render_template('college_dashboard.html', complaints=complaints_list, staff_members=staff_members,
+                           college_code=college_code, auto_assign=auto_assign)
 
 @app.route('/staff/signup', methods=['GET', 'POST'])
 def staff_signup():
@@ -437,23 +880,36 @@ def complaint_new():
         db = get_db()
         cursor = db.cursor()
         
-        # Get the college_id for the student (assuming first college for demo purposes)
-        # In production, you'd link students to colleges properly
-        cursor.execute('SELECT id FROM colleges LIMIT 1')
-        college = cursor.fetchone()
+        # Get the college_id from the student's college code, falling back to
+        # the first college for students who signed up without one
+        college = None
+        if session.get('college_code'):
+            cursor.execute('SELECT id FROM colleges WHERE college_code = ?', (session['college_code'],))
+            college = cursor.fetchone()
+        # Only route complaints whose college we actually know, the fallback
+        # college's dashboard does not list them
+        can_auto_assign = college is not None
+        if not college:
+            cursor.execute('SELECT id FROM colleges LIMIT 1')
+            college = cursor.fetchone()
         college_id = college['id'] if college else None
         
         cursor.execute('''INSERT INTO complaints (title, description, attachment, student_id, college_id) 
                          VALUES (?, ?, ?, ?, ?)''', 
                       (title, description, attachment, session['user_id'], college_id))
-        db.commit()
         complaint_id = cursor.lastrowid
         
+        staff_id = None
+        if can_auto_assign:
+            staff_id = auto_assign_complaint(cursor, complaint_id, college_id, f'{title} {description}')
+        db.commit()
+        db.close()
+        
         # Notify college about new complaint
         if college_id:
             create_notification('college', college_id, f'New complaint submitted: {title}')
-        
-        db.close()
+        if staff_id:
+            create_notification('staff', staff_id, f'You have been assigned a complaint: {title}')
         
         flash('Complaint submitted successfully!', 'success')
         return redirect(url_for('student_dashboard'))
@@ -494,6 +950,7 @@ def add_staff():
         name = request.form['name']
         email = request.form['email']
         password = request.form['password']
+        keywords = ', '.join(parse_keywords(request.form.get('keywords', '')))
         college_id = session['user_id']
         
         db = get_db()
@@ -501,8 +958,8 @@ def add_staff():
         
         try:
             hashed_password = generate_password_hash(password)
-            cursor.execute('INSERT INTO staff (name, email, password, college_id) VALUES (?, ?, ?, ?)', 
-                          (name, email, hashed_password, college_id))
+            cursor.execute('INSERT INTO staff (name, email, password, college_id, keywords) VALUES (?, ?, ?, ?, ?)', 
+                          (name, email, hashed_password, college_id, keywords))
             db.commit()
             flash('Staff added successfully!', 'success')
         except sqlite3.IntegrityError:
@@ -523,13 +980,17 @@ def assign_complaint():
     db = get_db()
     cursor = db.cursor()
     
-    cursor.execute('UPDATE complaints SET staff_id = ?, status = ? WHERE id = ?', 
-                   (staff_id, 'In Progress', complaint_id))
-    
-    # Get complaint details for notification
-    cursor.execute('SELECT title FROM complaints WHERE id = ?', (complaint_id,))
+    # Get complaint details for notification and workload counters
+    cursor.execute('SELECT title, staff_id, status FROM complaints WHERE id = ?', (complaint_id,))
     complaint = cursor.fetchone()
     
+    cursor.execute('UPDATE complaints SET staff_id = ?, status = ?, assigned_by = ? WHERE id = ?', 
+                   (staff_id, 'In Progress', 'manual', complaint_id))
+    
+    if complaint['status'] != 'Resolved':
+        adjust_open_count(cursor, complaint['staff_id'], -1)
+    adjust_open_count(cursor, staff_id, 1)
+    
     db.commit()
     db.close()
     
@@ -538,6 +999,59 @@ def assign_complaint():
     
     return jsonify({'success': True})
 
+@app.route('/college/auto-assign', methods=['POST'])
+def toggle_auto_assign():
+    if 'user_id' not in session or session['user_type'] != 'college':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    enabled = bool(request.json.get('enabled'))
+    
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute('UPDATE colleges SET auto_assign = ? WHERE id = ?', (int(enabled), session['user_id']))
+    db.commit()
+    db.close()
+    
+    return jsonify({'success': True, 'enabled': enabled})
+
+@app.route('/college/staff/<int:staff_id>/keywords', methods=['POST'])
+def update_staff_keywords(staff_id):
+    if 'user_id' not in session or session['user_type'] != 'college':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    keywords = ', '.join(parse_keywords(request.json.get('keywords', '')))
+    
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute('UPDATE staff SET keywords = ? WHERE id = ? AND college_id = ?',
+                   (keywords, staff_id, session['user_id']))
+    updated = cursor.rowcount
+    db.commit()
+    db.close()
+    
+    return jsonify({'success': bool(updated), 'keywords': keywords})
+
+@app.route('/college/routing/simulate')
+def simulate_routing_policies():
+    """Dry run: compare routing policies on this college's complaint history"""
+    if 'user_id' not in session or session['user_type'] != 'college':
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    policy = request.args.get('policy')
+    if policy and policy not in ROUTING_POLICIES:
+        return jsonify({'success': False, 'message': f'Unknown policy: {policy}'})
+    policies = [policy] if policy else ROUTING_POLICIES
+    hold_hours = request.args.get('hold_hours', 72, type=float)
+    if not math.isfinite(hold_hours) or not 0 <= hold_hours <= MAX_HOLD_HOURS:
+        return jsonify({'success': False, 'message': f'hold_hours must be between 0 and {MAX_HOLD_HOURS}'})
+    
+    db = get_db()
+    cursor = db.cursor()
+    results = [simulate_routing(cursor, session['user_id'], p, hold_hours) for p in policies]
+    db.close()
+    
+    return jsonify({'success': True, 'results': results})
+
 @app.route('/complaint/update-status', methods=['POST'])
 def update_status():
     if 'user_id' not in session or session['user_type'] != 'staff':
@@ -549,11 +1063,17 @@ def update_status():
     db = get_db()
     cursor = db.cursor()
     
+    # Get complaint details for notification and workload counters
+    cursor.execute('SELECT title, student_id, staff_id, status FROM complaints WHERE id = ?', (complaint_id,))
+    complaint = cursor.fetchone()
+    
     cursor.execute('UPDATE complaints SET status = ? WHERE id = ?', (status, complaint_id))
     
-    # Get complaint details for notification
-    cursor.execute('SELECT title, student_id FROM complaints WHERE id = ?', (complaint_id,))
-    complaint = cursor.fetchone()
+    # Keep the assigned staff member's open complaint counter in sync
+    if complaint['status'] != 'Resolved' and status == 'Resolved':
+        adjust_open_count(cursor, complaint['staff_id'], -1)
+    elif complaint['status'] == 'Resolved' and status != 'Resolved':
+        adjust_open_count(cursor, complaint['staff_id'], 1)
     
     db.commit()
     db.close()
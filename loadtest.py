@@ -0,0 +1,98 @@
+"""Small load test harness for ComplaintBox.
+
+Fires concurrent requests at one endpoint and reports status codes and
+latency, which shows how the load shedding in app.py behaves under a spike.
+Start the app the way the Procfile does, so the concurrency caps apply:
+
+    RATE_LIMIT_BACKEND=local gunicorn app:app -w 2 --threads 8 -b 127.0.0.1:8000
+
+Then run a login spike and, while it is going, a notification poll load test
+from a second terminal. The polls should stay fast while the extra logins are
+shed with 429/503; restart the app with RATE_LIMIT_ENABLED=0 to compare.
+
+    python loadtest.py --path /college/login --method POST --data "email=admin@example.com&password=wrong" -c 50 -n 500
+    python loadtest.py --path /notifications --login student:me@example.com:secret -c 2 -n 20
+
+Only the standard library is used so it runs anywhere the app does.
+"""
+import argparse
+import http.cookiejar
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+
+def build_opener(base_url, login):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    if login:
+        user_type, email, password = login.split(':', 2)
+        data = urllib.parse.urlencode({'email': email, 'password': password}).encode()
+        opener.open(f'{base_url}/{user_type}/login', data=data)
+    return opener
+
+
+def send(opener, url, method, data):
+    request = urllib.request.Request(url, data=data, method=method)
+    start = time.perf_counter()
+    try:
+        with opener.open(request) as response:
+            response.read()
+            status, retry_after = response.status, None
+    except urllib.error.HTTPError as e:
+        status, retry_after = e.code, e.headers.get('Retry-After')
+    except OSError:
+        # Connection refused or reset, e.g. the server ran out of workers
+        status, retry_after = 'error', None
+    return status, time.perf_counter() - start, retry_after
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test a ComplaintBox endpoint')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='base url of the app')
+    parser.add_argument('--path', default='/notifications', help='endpoint path to hit')
+    parser.add_argument('--method', default='GET')
+    parser.add_argument('--data', help='urlencoded form body for POST requests')
+    parser.add_argument('--login', help='log in first as user_type:email:password')
+    parser.add_argument('-c', '--concurrency', type=int, default=20)
+    parser.add_argument('-n', '--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+    opener = build_opener(base_url, args.login)
+    data = args.data.encode() if args.data else None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: send(opener, base_url + args.path, args.method, data),
+                                range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _, _ in results)
+    print(f'{args.requests} requests, concurrency {args.concurrency}, {elapsed:.2f}s '
+          f'({args.requests / elapsed:.1f} req/s)')
+    for status, count in sorted(statuses.items(), key=lambda item: str(item[0])):
+        print(f'  {status}: {count}')
+
+    for label, wanted in (('served', lambda s: s not in (429, 503, 'error')),
+                          ('shed', lambda s: s in (429, 503))):
+        latencies = sorted(latency for status, latency, _ in results if wanted(status))
+        if latencies:
+            print(f'  {label} latency ms: p50 {percentile(latencies, 0.5) * 1000:.1f}  '
+                  f'p95 {percentile(latencies, 0.95) * 1000:.1f}  max {latencies[-1] * 1000:.1f}')
+
+    retry_after = Counter(value for _, _, value in results if value)
+    if retry_after:
+        print('  Retry-After: ' + ', '.join(f'{value}s x{count}' for value, count in sorted(retry_after.items())))
+
+
+if __name__ == '__main__':
+    main()
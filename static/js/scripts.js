@@ -30,7 +30,11 @@ document.addEventListener('DOMContentLoaded', function() {
 
     function loadNotifications() {
         fetch('/notifications')
-            .then(response => response.json())
+            .then(response => {
+                // Keep showing the last list when the server sheds the poll
+                if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                return response.json();
+            })
             .then(data => {
                 displayNotifications(data);
                 updateNotificationCount(data);
@@ -222,7 +226,10 @@ document.addEventListener('DOMContentLoaded', function() {
         const originalLoadNotifications = loadNotifications;
         loadNotifications = function() {
             fetch('/notifications')
-                .then(response => response.json())
+                .then(response => {
+                    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+                    return response.json();
+                })
                 .then(data => {
                     displayNotifications(data);
                     updateNotificationCount(data);